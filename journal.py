@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+import wave
+from src.audio_journal import AudioJournal, EVENT_NAMES
+from src.config import JournalConfig
+
+def list_events(journal: AudioJournal, kind: str = None):
+    now = time.time()
+    print(f"{'Index':>7}  {'Kind':<16}{'Score':>6}  {'When':<20}{'Age':>9}")
+    for event in journal.events():
+        if kind and event["kind"] != kind:
+            continue
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["time"]))
+        print(f"{event['index']:>7}  {event['kind']:<16}{event['score']:>6.2f}  {when:<20}{now - event['time']:>8.0f}s")
+
+def extract(journal: AudioJournal, events: list[dict], before: float, after: float, out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    for event in events:
+        start = event["sample_pos"] - int(before * journal.sample_rate)
+        end = event["sample_pos"] + int(after * journal.sample_rate)
+        audio = journal.read(start, end)
+        if not len(audio):
+            print(f"Event {event['index']}: audio already overwritten, skipping", file=sys.stderr)
+            continue
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(event["time"]))
+        path = os.path.join(out_dir, f"{stamp}-{event['kind']}-{event['index']}-{event['score']:.2f}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(journal.sample_rate)
+            f.writeframes(audio.tobytes())
+        print(f"Wrote {path} ({len(audio) / journal.sample_rate:.1f}s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the Jarvis audio journal and extract clips around events")
+    parser.add_argument("--path", default=JournalConfig.path, help="Journal file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List indexed events")
+    list_parser.add_argument("--kind", choices=EVENT_NAMES.values(), help="Only show this event kind")
+
+    extract_parser = subparsers.add_parser("extract", help="Write WAV clips around events")
+    extract_parser.add_argument("indices", nargs="*", type=int, help="Event indices (from 'list')")
+    extract_parser.add_argument("--kind", choices=EVENT_NAMES.values(), help="Extract every event of this kind")
+    extract_parser.add_argument("--before", type=float, default=3.0, help="Seconds before the event")
+    extract_parser.add_argument("--after", type=float, default=2.0, help="Seconds after the event")
+    extract_parser.add_argument("-o", "--out-dir", default="clips", help="Output directory")
+
+    args = parser.parse_args()
+    # Read-only mapping: safe to run while Jarvis is writing
+    journal = AudioJournal(args.path)
+
+    if args.command == "list":
+        list_events(journal, args.kind)
+    else:
+        events = [e for e in journal.events() if e["index"] in args.indices or e["kind"] == args.kind]
+        if not events:
+            parser.error("No matching events (give indices from 'list' or --kind)")
+        extract(journal, events, args.before, args.after, args.out_dir)
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,11 @@ import asyncio
 import sys
 import signal
 import argparse
-from src.config import AppConfig
+import os
+from src.config import load_config
+from src.config_reload import ConfigWatcher
 from src.engine import AudioEngine
+from src.profiler import SamplingProfiler
 from src.logger import setup_logger
 
 logger = setup_logger("Main")
@@ -11,13 +14,16 @@ logger = setup_logger("Main")
 async def main():
     parser = argparse.ArgumentParser(description="Jarvis Voice Assistant")
     parser.add_argument("-t", "--test", action="store_true", help="Run in minimal test mode (Wake Word -> Toggle Lights)")
+    parser.add_argument("-c", "--config", default=os.getenv("JARVIS_CONFIG"), help="TOML config file, reloaded on change or SIGHUP")
+    parser.add_argument("-p", "--profile", action="store_true", help="Sample all threads and write a flamegraph + per-stage CPU summary on exit (toggle at runtime with SIGUSR1)")
     args = parser.parse_args()
 
     logger.info("Initializing Jarvis...")
     
     # Load configuration
-    config = AppConfig()
+    config = load_config(args.config)
     config.test_mode = args.test
+    config.profiler.enabled = config.profiler.enabled or args.profile
     
     if config.test_mode:
         logger.info("⚠️ RUNNING IN TEST MODE: Wake Word will trigger 'Toggle Bedroom Lights' directly.")
@@ -38,6 +44,19 @@ async def main():
             
         for sig in (signal.SIGINT, signal.SIGTERM):
             loop.add_signal_handler(sig, signal_handler)
+
+        # Profiling: samples are attributed to the engine's current pipeline stage
+        profiler = SamplingProfiler(config.profiler, lambda: engine.state)
+        if config.profiler.enabled:
+            profiler.start()
+        loop.add_signal_handler(signal.SIGUSR1, profiler.toggle)
+
+        # Hot reload: config file changes or SIGHUP rebuild only the affected components
+        watcher_task = None
+        if args.config:
+            watcher = ConfigWatcher(args.config, engine.apply_config)
+            watcher_task = asyncio.create_task(watcher.run())
+            loop.add_signal_handler(signal.SIGHUP, watcher.trigger)
             
         # Start engine as a task
         engine_task = asyncio.create_task(engine.start())
@@ -46,11 +65,14 @@ async def main():
         await stop_signal.wait()
         
         # Stop engine
+        if watcher_task:
+            watcher_task.cancel()
         engine_task.cancel()
         try:
             await engine_task
         except asyncio.CancelledError:
             logger.info("Engine stopped successfully")
+        profiler.stop()
         
     except Exception as e:
         logger.critical(f"Fatal error: {e}", exc_info=True)
@@ -0,0 +1,178 @@
+import os
+import time
+from typing import Optional
+import numpy as np
+from src.config import JournalConfig
+from src.logger import setup_logger
+
+logger = setup_logger("AudioJournal")
+
+# --- On-disk layout: header | event index ring | PCM ring ---
+
+MAGIC = b"JVJ1"
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("sample_rate", "<u4"),
+    ("index_capacity", "<u4"),
+    ("capacity", "<u8"),       # PCM ring size in samples
+    ("write_pos", "<u8"),      # Total samples ever written (ring offset = write_pos % capacity)
+    ("event_count", "<u8"),    # Total events ever written
+])
+
+EVENT_DTYPE = np.dtype([
+    ("sample_pos", "<u8"),     # Absolute sample position the event refers to
+    ("time", "<f8"),           # Unix timestamp
+    ("score", "<f4"),
+    ("kind", "u1"),
+])
+
+WAKE_SCORE = 1        # Wake word score above the journal's floor (near misses included)
+WAKE_DETECTED = 2
+UTTERANCE_START = 3
+UTTERANCE_END = 4
+
+EVENT_NAMES = {
+    WAKE_SCORE: "wake_score",
+    WAKE_DETECTED: "wake_detected",
+    UTTERANCE_START: "utterance_start",
+    UTTERANCE_END: "utterance_end",
+}
+
+def _layout(index_capacity: int, capacity: int) -> tuple[int, int, int]:
+    """Returns (events offset, PCM offset, total file size) in bytes"""
+    events_offset = HEADER_DTYPE.itemsize
+    pcm_offset = events_offset + index_capacity * EVENT_DTYPE.itemsize
+    pcm_offset += pcm_offset % 2  # int16 alignment
+    return events_offset, pcm_offset, pcm_offset + capacity * 2
+
+class AudioJournal:
+    """
+    Rolling journal of the last N minutes of microphone audio plus an index of detection
+    scores and utterance boundaries, kept in a preallocated memory-mapped file.
+    write() is called from the audio callback thread and only copies into the mapped ring
+    (no buffer allocations). The file is reused across restarts if its geometry matches,
+    and can be read by another process while Jarvis is running (see journal.py).
+    """
+    def __init__(self, path: str, mode: str = "r"):
+        self.path = path
+        self._map = np.memmap(path, dtype=np.uint8, mode=mode)
+        self._header = self._map[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)
+        if self._header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not an audio journal")
+
+        self.sample_rate = int(self._header["sample_rate"][0])
+        self.capacity = int(self._header["capacity"][0])
+        self.index_capacity = int(self._header["index_capacity"][0])
+        events_offset, pcm_offset, _ = _layout(self.index_capacity, self.capacity)
+        self._events = self._map[events_offset:events_offset + self.index_capacity * EVENT_DTYPE.itemsize].view(EVENT_DTYPE)
+        self._pcm = self._map[pcm_offset:].view(np.int16)
+
+        self._write_pos = int(self._header["write_pos"][0])
+        self._event_count = int(self._header["event_count"][0])
+
+    @classmethod
+    def create(cls, config: JournalConfig, sample_rate: int) -> "AudioJournal":
+        """Opens the journal for writing, (re)allocating the file if its geometry changed"""
+        capacity = int(config.minutes * 60 * sample_rate)
+        _, _, size = _layout(config.index_capacity, capacity)
+
+        if os.path.exists(config.path) and os.path.getsize(config.path) == size:
+            try:
+                journal = cls(config.path, mode="r+")
+                if (journal.sample_rate, journal.capacity, journal.index_capacity) == (sample_rate, capacity, config.index_capacity):
+                    logger.info(f"Reusing audio journal {config.path} ({config.minutes} min)")
+                    return journal
+                journal.close()
+            except ValueError:
+                pass
+
+        logger.info(f"Allocating audio journal {config.path} ({config.minutes} min, {size / 1e6:.0f} MB)")
+        os.makedirs(os.path.dirname(config.path) or ".", exist_ok=True)
+        with open(config.path, "wb") as f:
+            f.truncate(size)
+            try:
+                # Reserve the blocks up front so writes from the audio thread never hit ENOSPC mid-stream
+                os.posix_fallocate(f.fileno(), 0, size)
+            except (AttributeError, OSError):
+                pass
+
+        header = np.memmap(config.path, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        header["magic"] = MAGIC
+        header["sample_rate"] = sample_rate
+        header["index_capacity"] = config.index_capacity
+        header["capacity"] = capacity
+        header["write_pos"] = 0
+        header["event_count"] = 0
+        header.flush()
+        del header
+        return cls(config.path, mode="r+")
+
+    @property
+    def position(self) -> int:
+        """Total samples written so far"""
+        return self._write_pos
+
+    def write(self, samples: np.ndarray):
+        """Appends (frames, channels) or (frames,) int16 audio; only the first channel is kept"""
+        if samples.ndim > 1:
+            samples = samples[:, 0]
+        n = samples.shape[0]
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._pcm[start:start + first] = samples[:first]
+        if first < n:
+            self._pcm[:n - first] = samples[first:]
+
+        # Publish the new position only after the samples are in place
+        self._write_pos += n
+        self._header["write_pos"] = self._write_pos
+
+    def mark(self, kind: int, score: float = 0.0, sample_pos: Optional[int] = None):
+        """Records an event in the index ring"""
+        event = self._events[self._event_count % self.index_capacity]
+        event["sample_pos"] = self._write_pos if sample_pos is None else max(sample_pos, 0)
+        event["time"] = time.time()
+        event["score"] = score
+        event["kind"] = kind
+        self._event_count += 1
+        self._header["event_count"] = self._event_count
+
+    def events(self) -> list[dict]:
+        """Events still in the index, oldest first. 'index' is stable across calls."""
+        count = int(self._header["event_count"][0])
+        first = max(count - self.index_capacity, 0)
+        events = []
+        for index in range(first, count):
+            event = self._events[index % self.index_capacity]
+            events.append({
+                "index": index,
+                "kind": EVENT_NAMES.get(int(event["kind"]), str(int(event["kind"]))),
+                "sample_pos": int(event["sample_pos"]),
+                "time": float(event["time"]),
+                "score": float(event["score"]),
+            })
+        return events
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns a copy of the samples in [start, end), clipped to what is still in the ring.
+        A margin at the oldest end is skipped because the writer may be overwriting it.
+        """
+        write_pos = int(self._header["write_pos"][0])
+        oldest = max(write_pos - self.capacity + self.sample_rate, 0)
+        start, end = max(start, oldest), min(end, write_pos)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+
+        offset = start % self.capacity
+        n = end - start
+        first = min(n, self.capacity - offset)
+        return np.concatenate([self._pcm[offset:offset + first], self._pcm[:n - first]])
+
+    def close(self):
+        """Flushes and unmaps the file; the views share the mapping, so all of them must go"""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._header = self._events = self._pcm = self._map = None
@@ -1,14 +1,17 @@
 import asyncio
 import sounddevice as sd
 import numpy as np
+from typing import Optional
 from src.config import AudioConfig
 from src.logger import setup_logger
+from src.audio_journal import AudioJournal
 
 logger = setup_logger("AudioStream")
 
 class AudioStream:
-    def __init__(self, config: AudioConfig):
+    def __init__(self, config: AudioConfig, journal: Optional[AudioJournal] = None):
         self.config = config
+        self.journal = journal
         self.queue = asyncio.Queue()
         self.loop = asyncio.get_running_loop()
         self.stream = None
@@ -18,6 +21,10 @@ class AudioStream:
         """Callback for sounddevice input stream"""
         if status:
             logger.warning(f"Audio callback status: {status}")
+
+        # Journal first, straight from the device buffer: it keeps audio that clear_queue() drops
+        if self.journal:
+            self.journal.write(indata)
         
         # We must use call_soon_threadsafe because this callback runs in a separate thread
         self.loop.call_soon_threadsafe(self.queue.put_nowait, indata.copy())
@@ -1,8 +1,14 @@
+import asyncio
+import json
+import re
+import time
+from collections import Counter, deque
 import ollama
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from src.config import AppConfig
 from src.logger import setup_logger
+from src.intent_parser import has_pronoun, normalize, parse_command, parse_state_query
 
 logger = setup_logger("Brain")
 
@@ -21,6 +27,12 @@ class MusicControl(BaseModel):
     song: Optional[str] = Field(None, description="Song name if requested")
     artist: Optional[str] = Field(None, description="Artist name if requested")
 
+class StateQuery(BaseModel):
+    intent: Literal["state_query"] = "state_query"
+    location: str = Field(..., description="The room or device being asked about (e.g., 'kitchen', 'front door')")
+    domain: Optional[str] = Field(None, description="Home Assistant domain if known (e.g., 'light', 'sensor')")
+    attribute: Optional[str] = Field(None, description="Measured quantity if asked (e.g., 'temperature', 'humidity')")
+
 class GeneralQuery(BaseModel):
     intent: Literal["general_query"] = "general_query"
     query: str = Field(..., description="The user's general question or request")
@@ -33,14 +45,27 @@ class Brain:
         self.config = config
         self.model_name = config.brain.model_name
         self.client = ollama.AsyncClient(host=config.brain.ollama_host)
+        self.tier_hits = Counter()
+        self._primary_latencies = deque(maxlen=200)
+        self._speculation: Optional[dict] = None
+        self.speculation_hits = 0
+        self.speculation_misses = 0
+        self.speculation_saved_seconds = 0.0
         
         # We can't await in __init__, so we'll do the check lazily or start a task
         # For simplicity, we'll just log that we are ready
         logger.info(f"Brain initialized with model: {self.model_name}")
 
-    async def ensure_model(self):
+    async def ensure_model(self) -> bool:
+        """Makes sure the configured models are available, pulling them if needed. Returns False on failure."""
+        ok = await self._ensure(self.model_name)
+        if self.config.brain.fallback_model_name:
+            ok = await self._ensure(self.config.brain.fallback_model_name) and ok
+        return ok
+
+    async def _ensure(self, model_name: str) -> bool:
         try:
-            logger.info(f"Checking for model '{self.model_name}'...")
+            logger.info(f"Checking for model '{model_name}'...")
             models = await self.client.list()
             # models['models'] is a list of objects, which might be dicts or objects depending on client version
             # The error 'name' suggests we might be accessing it wrong or the structure is different
@@ -53,22 +78,214 @@ class Brain:
                     model_names.append(getattr(m, 'model', getattr(m, 'name', '')))
             
             # Check if model exists
-            if not any(self.model_name in m for m in model_names):
-                logger.info(f"Model '{self.model_name}' not found. Pulling... (this may take a while)")
-                await self.client.pull(self.model_name)
-                logger.info(f"Model '{self.model_name}' pulled successfully.")
+            if not any(model_name in m for m in model_names):
+                logger.info(f"Model '{model_name}' not found. Pulling... (this may take a while)")
+                await self.client.pull(model_name)
+                logger.info(f"Model '{model_name}' pulled successfully.")
             else:
-                logger.info(f"Model '{self.model_name}' is ready.")
+                logger.info(f"Model '{model_name}' is ready.")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to connect to Ollama or pull model: {e}")
+            return False
+
+    async def keep_warm(self) -> Optional[float]:
+        """
+        Loads the model (or extends its keep-alive) without generating anything.
+        Returns the time taken, or None if Ollama couldn't load it.
+        """
+        started = time.monotonic()
+        try:
+            await self.client.generate(model=self.model_name, prompt="", keep_alive=self.config.brain.keep_alive)
+        except Exception as e:
+            logger.warning(f"Failed to keep model '{self.model_name}' warm: {e}")
+            return None
+        return time.monotonic() - started
 
-    async def process(self, text: str) -> dict:
+    async def process(self, text: str, context: Optional[dict] = None) -> dict:
         """
         Process the user's text and return a structured intent.
+        context is the previous exchange ({"text", "intent"}) in a follow-up conversation,
+        used to resolve references like "dim them".
+        If a speculation was started on the same text, its result is committed instead.
         """
         logger.info(f"Thinking about: '{text}'")
-        
+        started = time.monotonic()
+
+        speculation, self._speculation = self._speculation, None
+        if speculation and speculation["key"] == normalize(text):
+            intent, tier = await speculation["task"]
+            saved = min(speculation["finished"], started) - speculation["started"]
+            self.speculation_hits += 1
+            self.speculation_saved_seconds += saved
+            logger.info(f"Committed speculative intent (saved {saved:.2f}s)")
+        else:
+            if speculation:
+                speculation["task"].cancel()
+                self.speculation_misses += 1
+                logger.info(f"Speculation on '{speculation['text']}' did not match, restarting")
+            intent, tier = await self._infer(text, context)
+
+        self.tier_hits[tier] += 1
+        logger.info(f"Answered by tier '{tier}' in {time.monotonic() - started:.2f}s")
+        return intent
+
+    def speculate(self, text: str, context: Optional[dict] = None):
+        """
+        Starts intent inference on a stable partial transcript in the background.
+        Nothing is dispatched from here: process() commits the result only if the final
+        transcript matches, otherwise the speculation is cancelled.
+        """
+        key = normalize(text)
+        if self._speculation and self._speculation["key"] == key:
+            return
+        self.cancel_speculation()
+
+        logger.info(f"Speculating on partial transcript: '{text}'")
+        speculation = {"key": key, "text": text, "started": time.monotonic(), "finished": None}
+        speculation["task"] = asyncio.create_task(self._run_speculation(speculation, text, context))
+        self._speculation = speculation
+
+    def cancel_speculation(self):
+        if self._speculation:
+            self._speculation["task"].cancel()
+            self.speculation_misses += 1
+            self._speculation = None
+
+    async def _run_speculation(self, speculation: dict, text: str, context: Optional[dict]) -> tuple[dict, str]:
+        result = await self._infer(text, context)
+        speculation["finished"] = time.monotonic()
+        return result
+
+    async def _infer(self, text: str, context: Optional[dict]) -> tuple[dict, str]:
+        """Returns the intent and the name of the tier that produced it"""
+        # Status questions are answered from the local state mirror, no LLM needed.
+        # In a follow-up, pronouns ("is it on?") refer to the previous exchange, which only the LLM sees.
+        state_query = None if context and has_pronoun(text) else parse_state_query(text)
+        if state_query:
+            logger.info(f"Matched state query without LLM: {state_query}")
+            return state_query, "state_query"
+        return await self._process_with_fallbacks(text, context)
+
+    def speculation_stats(self) -> dict:
+        attempts = self.speculation_hits + self.speculation_misses
+        return {
+            "hits": self.speculation_hits,
+            "misses": self.speculation_misses,
+            "hit_ratio": self.speculation_hits / attempts if attempts else 0.0,
+            "saved_seconds": self.speculation_saved_seconds,
+        }
+
+    async def _process_with_fallbacks(self, text: str, context: Optional[dict]) -> tuple[dict, str]:
+        """
+        Degradation chain under per-request deadlines:
+        primary model -> smaller fallback model -> deterministic parser -> "timed out" acknowledgement.
+        Returns the intent and the name of the tier that produced it.
+        """
+        brain = self.config.brain
+        timed_out = False
+        error = None
+
+        # Tier 1: primary model, optionally hedged with the fallback model past its p95 latency
+        hedge_delay = self._hedge_delay()
+        started = time.monotonic()
+        try:
+            return await self._ask_primary(text, context, hedge_delay)
+        except asyncio.TimeoutError:
+            timed_out = True
+            logger.warning(f"Model '{self.model_name}' missed its {brain.timeout_seconds:.1f}s deadline")
+        except Exception as e:
+            error = e
+            logger.error(f"Brain processing failed: {e}")
+
+        # Tier 2: smaller model, unless it already ran as the hedge
+        hedged = hedge_delay is not None and time.monotonic() - started >= hedge_delay
+        if brain.fallback_model_name and not hedged:
+            try:
+                intent = await asyncio.wait_for(
+                    self._ask(brain.fallback_model_name, text, context),
+                    timeout=brain.fallback_timeout_seconds,
+                )
+                return intent, "fallback_model"
+            except asyncio.TimeoutError:
+                timed_out = True
+                logger.warning(f"Fallback model '{brain.fallback_model_name}' missed its {brain.fallback_timeout_seconds:.1f}s deadline")
+            except Exception as e:
+                error = e
+                logger.error(f"Fallback model failed: {e}")
+
+        # Tier 3: deterministic parser for common commands.
+        # It can't resolve "dim them" against the previous exchange, so it sits out follow-ups with pronouns.
+        intent = None if context and has_pronoun(text) else parse_command(text)
+        if intent:
+            return intent, "parser"
+
+        # Tier 4: tell the user the request timed out rather than staying silent
+        if timed_out:
+            return {"intent": "general_query", "query": text, "response": "Sorry, that request timed out. Please try again."}, "ack"
+        return {"intent": "error", "message": str(error)}, "error"
+
+    async def _ask_primary(self, text: str, context: Optional[dict], hedge_delay: Optional[float]) -> tuple[dict, str]:
+        """
+        Runs the primary model under its deadline. If hedge_delay is set and the primary is still
+        running after it, the fallback model is raced against it and the first answer wins.
+        """
+        brain = self.config.brain
+        started = time.monotonic()
+        deadline = started + brain.timeout_seconds
+        tasks = {asyncio.create_task(self._ask(self.model_name, text, context)): "primary"}
+        error = None
+
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    logger.info(f"Primary model slower than its p95 ({hedge_delay:.2f}s), hedging with '{brain.fallback_model_name}'")
+                    tasks[asyncio.create_task(self._ask(brain.fallback_model_name, text, context))] = "hedge"
+
+            while tasks:
+                remaining = deadline - time.monotonic()
+                done, _ = await asyncio.wait(tasks, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+
+                for task in done:
+                    tier = tasks.pop(task)
+                    if tier == "primary":
+                        self._primary_latencies.append(time.monotonic() - started)
+                    if task.exception() is None:
+                        return task.result(), tier
+                    error = task.exception()
+
+            raise error
+        finally:
+            for task, tier in tasks.items():
+                if tier == "primary":
+                    # Cancelled (deadline or lost the hedge race): its latency is at least this long.
+                    # Leaving it out would bias the p95 towards fast requests and over-hedge.
+                    self._primary_latencies.append(time.monotonic() - started)
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """p95 of recent primary latencies, or None if hedging is off or there's too little history"""
+        brain = self.config.brain
+        if not brain.hedge_enabled or not brain.fallback_model_name:
+            return None
+        if len(self._primary_latencies) < brain.hedge_min_samples:
+            return None
+        latencies = sorted(self._primary_latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def tier_stats(self) -> dict:
+        """Fraction of requests answered by each tier"""
+        total = sum(self.tier_hits.values())
+        if not total:
+            return {}
+        return {tier: count / total for tier, count in self.tier_hits.items()}
+
+    async def _ask(self, model_name: str, text: str, context: Optional[dict]) -> dict:
+        """Asks a model for the intent as JSON. Raises if the response can't be parsed."""
         system_prompt = """
         You are Jarvis, a smart home assistant.
         Analyze the user's input and extract the intent.
@@ -76,43 +293,45 @@ class Brain:
         
         1. Light Control: {"intent": "light_control", "location": "room name", "action": "on/off/...", "color": "...", "brightness": 0-100}
         2. Music Control: {"intent": "music_control", "action": "play/pause/...", "song": "...", "artist": "..."}
-        3. General Query: {"intent": "general_query", "query": "...", "response": "Short answer to the user's query"}
+        3. State Query (questions about a device or sensor state): {"intent": "state_query", "location": "room or device", "domain": "light/sensor/...", "attribute": "temperature/humidity/..."}
+        4. General Query: {"intent": "general_query", "query": "...", "response": "Short answer to the user's query"}
         
         If the input is unclear, default to General Query.
         For General Queries, YOU MUST GENERATE A CONCISE RESPONSE in the "response" field.
+        If there is a previous exchange, use it to resolve references like "them" or "it".
         Do not output any markdown or explanations, ONLY the JSON object.
         """
+
+        messages = [{'role': 'system', 'content': system_prompt}]
+        if context:
+            messages.append({'role': 'user', 'content': context['text']})
+            messages.append({'role': 'assistant', 'content': json.dumps(context['intent'])})
+        messages.append({'role': 'user', 'content': text})
         
-        try:
-            response = await self.client.chat(model=self.model_name, messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': text},
-            ], format='json')
-            
-            content = response['message']['content']
-            logger.info(f"Brain thought: {content}")
-            
-            import json
-            import re
-            
-            # Clean up potential markdown code blocks
-            content = content.strip()
-            if "```" in content:
-                # Extract content between code blocks
-                match = re.search(r"```(?:json)?(.*?)```", content, re.DOTALL)
-                if match:
-                    content = match.group(1).strip()
-            
-            # Find the first '{' and last '}'
-            start = content.find('{')
-            end = content.rfind('}')
-            
-            if start != -1 and end != -1:
-                content = content[start:end+1]
-                return json.loads(content)
-            else:
-                raise ValueError("No JSON object found in response")
-            
-        except Exception as e:
-            logger.error(f"Brain processing failed: {e}")
-            return {"intent": "error", "message": str(e)}
+        response = await self.client.chat(
+            model=model_name,
+            messages=messages,
+            format='json',
+            keep_alive=self.config.brain.keep_alive,
+        )
+        
+        content = response['message']['content']
+        logger.info(f"Brain thought ({model_name}): {content}")
+        
+        # Clean up potential markdown code blocks
+        content = content.strip()
+        if "```" in content:
+            # Extract content between code blocks
+            match = re.search(r"```(?:json)?(.*?)```", content, re.DOTALL)
+            if match:
+                content = match.group(1).strip()
+        
+        # Find the first '{' and last '}'
+        start = content.find('{')
+        end = content.rfind('}')
+        
+        if start != -1 and end != -1:
+            content = content[start:end+1]
+            return json.loads(content)
+        else:
+            raise ValueError("No JSON object found in response")
@@ -1,5 +1,7 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass, replace
+from typing import Optional, get_args, get_origin
 import os
+import tomllib
 
 @dataclass
 class AudioConfig:
@@ -13,22 +15,41 @@ class WakeWordConfig:
     model_names: list[str] = None
     threshold: float = 0.5
     inference_framework: str = "onnx"
+    warmup_runs: int = 3  # Synthetic predictions at load time (0 disables warm-up)
 
     def __post_init__(self):
         if self.model_names is None:
             self.model_names = ["hey_jarvis_v0.1"]
 
+@dataclass
+class VADConfig:
+    enabled: bool = True
+    noise_ratio: float = 2.0  # A chunk counts as sound when its RMS exceeds the noise floor by this factor (~6dB)
+    min_rms: float = 30.0  # int16 RMS level that always counts as silence, even in a very quiet room
+    noise_adapt_rate: float = 0.05  # Noise-floor EMA rate per quiet chunk (~1.6s time constant)
+    hangover_chunks: int = 10  # 800ms: keep inferring after the level drops (trailing syllables)
+    preroll_chunks: int = 16  # ~1.3s of quiet audio replayed into the model when the gate opens
+
 @dataclass
 class TranscriberConfig:
     model_size: str = "base.en"
     device: str = "cpu"
     compute_type: str = "int8"
     beam_size: int = 5
+    warmup_runs: int = 1  # Synthetic transcriptions at load time (0 disables warm-up)
 
 @dataclass
 class BrainConfig:
     ollama_host: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
     model_name: str = os.getenv("OLLAMA_MODEL", "phi3")
+    keep_alive: str = "10m"  # How long Ollama keeps the model loaded after a request
+    timeout_seconds: float = 8.0  # Deadline for the primary model before degrading
+    # Smaller model tried when the primary misses its deadline; empty disables the tier
+    fallback_model_name: str = os.getenv("OLLAMA_FALLBACK_MODEL", "")
+    fallback_timeout_seconds: float = 4.0
+    # Race the fallback model once the primary runs past its observed p95 latency
+    hedge_enabled: bool = False
+    hedge_min_samples: int = 20
 
 @dataclass
 class HomeAssistantConfig:
@@ -36,16 +57,96 @@ class HomeAssistantConfig:
     token: str = os.getenv("HA_TOKEN", "")
     timeout: int = 5
 
+@dataclass
+class ProfilerConfig:
+    enabled: bool = False  # Profile from startup (also: main.py --profile, or toggle with SIGUSR1)
+    interval_ms: int = 10
+    output_dir: str = "profiles"
+
+@dataclass
+class JournalConfig:
+    enabled: bool = False  # Keep a rolling on-disk copy of mic audio for replaying misfires
+    path: str = "journal/audio.journal"
+    minutes: float = 10.0  # ~19 MB of 16kHz int16 audio
+    index_capacity: int = 4096  # Events kept (wake scores, detections, utterance boundaries)
+    score_floor: float = 0.1  # Wake word scores at or above this are indexed, to catch near misses
+
 @dataclass
 class AppConfig:
     audio: AudioConfig = field(default_factory=AudioConfig)
     wake_word: WakeWordConfig = field(default_factory=WakeWordConfig)
+    vad: VADConfig = field(default_factory=VADConfig)
     transcriber: TranscriberConfig = field(default_factory=TranscriberConfig)
     brain: BrainConfig = field(default_factory=BrainConfig)
     ha: HomeAssistantConfig = field(default_factory=HomeAssistantConfig)
+    profiler: ProfilerConfig = field(default_factory=ProfilerConfig)
+    journal: JournalConfig = field(default_factory=JournalConfig)
     
     # Recording settings
     record_seconds: int = 5
+
+    # Follow-up window: after answering, listen for another command without the wake word
+    follow_up_enabled: bool = False
+    follow_up_seconds: float = 4.0
+
+    # Speculation: transcribe partial audio while recording and start intent inference early
+    speculation_enabled: bool = False
+    partial_interval_seconds: float = 1.0
     
     # Test mode flag
     test_mode: bool = False
+
+def _check_value(key: str, value, expected):
+    """Returns value as the field's type, raising ValueError on a mismatch (e.g. threshold = "0.6")"""
+    if expected is bool:
+        if isinstance(value, bool):
+            return value
+    elif expected is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    elif expected is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif expected is str:
+        if isinstance(value, str):
+            return value
+    elif get_origin(expected) is list:
+        (item_type,) = get_args(expected)
+        if isinstance(value, list):
+            return [_check_value(f"{key}[]", item, item_type) for item in value]
+    else:
+        return value
+    raise ValueError(f"Config key '{key}' must be {getattr(expected, '__name__', expected)}, got {value!r}")
+
+def _apply_section(section, prefix: str, values: dict):
+    types = {f.name: f.type for f in fields(section)}
+    changes = {}
+    for key, value in values.items():
+        if key not in types:
+            raise ValueError(f"Unknown config key: '{prefix}{key}'")
+        changes[key] = _check_value(prefix + key, value, types[key])
+    return replace(section, **changes)
+
+def load_config(path: Optional[str] = None) -> AppConfig:
+    """
+    Builds the AppConfig from defaults, overridden by a TOML file if given.
+    Sections match the AppConfig fields ([wake_word], [brain], ...); top-level keys set scalar options.
+    Raises ValueError on unknown keys or values of the wrong type, so a typo in a hot-reloaded
+    file is rejected instead of reaching the running engine.
+    """
+    config = AppConfig()
+    if not path:
+        return config
+
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    sections = {key: value for key, value in data.items() if is_dataclass(getattr(config, key, None))}
+    scalars = {key: value for key, value in data.items() if key not in sections}
+
+    for key, value in sections.items():
+        if not isinstance(value, dict):
+            raise ValueError(f"Config section '{key}' must be a table")
+        setattr(config, key, _apply_section(getattr(config, key), f"{key}.", value))
+
+    return _apply_section(config, "", scalars)
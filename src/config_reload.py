@@ -0,0 +1,58 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+from src.config import AppConfig, load_config
+from src.logger import setup_logger
+
+logger = setup_logger("ConfigReload")
+
+class ConfigWatcher:
+    """
+    Watches the config file and hands every successfully parsed new AppConfig to on_change.
+    Polls the file's mtime (no extra dependency); reload() can also be triggered directly, e.g. on SIGHUP.
+    """
+    def __init__(self, path: str, on_change: Callable[[AppConfig], Awaitable[None]], poll_seconds: float = 2.0):
+        self.path = path
+        self.on_change = on_change
+        self.poll_seconds = poll_seconds
+        self._mtime = self._get_mtime()
+        self._lock = asyncio.Lock()
+        self._triggered: set[asyncio.Task] = set()
+
+    def _get_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    async def run(self):
+        """Polls for changes until cancelled"""
+        logger.info(f"Watching config file: {self.path}")
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            mtime = self._get_mtime()
+            if mtime is not None and mtime != self._mtime:
+                self._mtime = mtime
+                await self.reload()
+
+    def trigger(self):
+        """Schedules a reload from a signal handler"""
+        # The loop only holds weak references to tasks; keep ours until the reload is done
+        task = asyncio.create_task(self.reload())
+        self._triggered.add(task)
+        task.add_done_callback(self._triggered.discard)
+
+    async def reload(self):
+        # Serialize reloads so a SIGHUP during a file-triggered reload doesn't interleave swaps
+        async with self._lock:
+            logger.info("Reloading configuration...")
+            try:
+                config = load_config(self.path)
+            except Exception as e:
+                logger.error(f"Invalid config, keeping the running one: {e}")
+                return
+            try:
+                await self.on_change(config)
+            except Exception as e:
+                # Keep watching: the next edit or SIGHUP gets another chance
+                logger.error(f"Failed to apply the new config: {e}")
@@ -1,11 +1,23 @@
+from typing import Optional
 from src.home_assistant import HomeAssistantClient
+from src.state_mirror import StateMirror
+from src.intent_parser import matches_name
 from src.logger import setup_logger
 
 logger = setup_logger("Dispatcher")
 
+# Services that are no-ops when the entity is already in the listed state
+_REDUNDANT_STATES = {
+    "turn_on": "on",
+    "turn_off": "off",
+    "media_play": "playing",
+    "media_pause": "paused",
+}
+
 class Dispatcher:
-    def __init__(self, ha_client: HomeAssistantClient):
+    def __init__(self, ha_client: HomeAssistantClient, state_mirror: Optional[StateMirror] = None):
         self.ha = ha_client
+        self.mirror = state_mirror
 
     async def dispatch(self, intent: dict):
         """Dispatches the intent to the appropriate handler"""
@@ -15,13 +27,15 @@ class Dispatcher:
             await self._handle_light_control(intent)
         elif intent_type == "music_control":
             await self._handle_music_control(intent)
+        elif intent_type == "state_query":
+            await self._handle_state_query(intent)
         elif intent_type == "general_query":
             await self._handle_general_query(intent)
         else:
             logger.warning(f"Unknown intent type: {intent_type}")
 
     async def _handle_light_control(self, intent: dict):
-        location = intent.get("location", "").lower()
+        location = (intent.get("location") or "").lower()
         action = intent.get("action", "on")
         
         entity_id = await self._find_entity_id("light", location)
@@ -38,6 +52,11 @@ class Dispatcher:
         if action == "on" and intent.get("brightness"):
              data["brightness_pct"] = intent["brightness"]
 
+        if len(data) == 1 and self._is_redundant(entity_id, service):
+            logger.info(f"Skipping Light Control: {entity_id} is already {_REDUNDANT_STATES[service]}")
+            intent["response"] = f"The {location} lights are already {_REDUNDANT_STATES[service]}."
+            return
+
         logger.info(f"Dispatching Light Control: {service} -> {entity_id}")
         await self.ha.call_service("light", service, data)
 
@@ -56,12 +75,71 @@ class Dispatcher:
         }
         
         service = service_map.get(action)
-        if service:
+        if service and self._is_redundant(entity_id, service):
+            logger.info(f"Skipping Music Control: {entity_id} is already {_REDUNDANT_STATES[service]}")
+        elif service:
             logger.info(f"Dispatching Music Control: {service} -> {entity_id}")
             await self.ha.call_service("media_player", service, {"entity_id": entity_id})
         else:
             logger.warning(f"Unknown music action: {action}")
 
+    async def _handle_state_query(self, intent: dict):
+        """Answers from real entity state and stores the spoken answer in intent['response']"""
+        # The LLM may return "location": null for "what's the temperature?"
+        location = (intent.get("location") or "").lower().strip()
+        domain = intent.get("domain")
+        attribute = intent.get("attribute")
+        if not location:
+            intent["response"] = "Which room?"
+            return
+
+        state = await self._find_state(location, domain, attribute)
+        if not state:
+            logger.warning(f"No entity found for state query: {location}")
+            intent["response"] = f"I don't know the state of the {location}."
+            return
+
+        value = state.get('state')
+        attributes = state.get('attributes', {})
+        logger.info(f"State Query: {state['entity_id']} = {value}")
+
+        if attribute:
+            unit = attributes.get('unit_of_measurement', '')
+            intent["response"] = f"The {location} {attribute} is {value} {unit}".strip() + "."
+        elif state['entity_id'].startswith("light.") and value == "on" and attributes.get('brightness'):
+            percent = round(attributes['brightness'] / 255 * 100)
+            intent["response"] = f"The {location} light is on at {percent} percent."
+        else:
+            intent["response"] = f"The {location} is {value}."
+
+    async def _find_state(self, location: str, domain: Optional[str], attribute: Optional[str]) -> Optional[dict]:
+        states = await self._get_states()
+        if domain:
+            states = [s for s in states if s['entity_id'].startswith(f"{domain}.")]
+        if attribute:
+            states = [s for s in states if s.get('attributes', {}).get('device_class') == attribute]
+
+        for state in states:
+            if matches_name(location, state.get('attributes', {}).get('friendly_name', '')):
+                return state
+        for state in states:
+            if matches_name(location, state['entity_id']):
+                return state
+        return None
+
+    def _is_redundant(self, entity_id: str, service: str) -> bool:
+        """True if the mirror shows the entity already in the state the service would set"""
+        if not self.mirror or not self.mirror.ready or service not in _REDUNDANT_STATES:
+            return False
+        state = self.mirror.get(entity_id)
+        return bool(state) and state.get('state') == _REDUNDANT_STATES[service]
+
+    async def _get_states(self) -> list[dict]:
+        """Entity states from the local mirror, falling back to a HA round trip"""
+        if self.mirror and self.mirror.ready:
+            return self.mirror.states()
+        return await self.ha.get_states()
+
     async def _handle_general_query(self, intent: dict):
         query = intent.get("query")
         logger.info(f"General Query (No Action): {query}")
@@ -69,9 +147,9 @@ class Dispatcher:
     async def _find_entity_id(self, domain: str, keyword: str) -> str:
         """
         Finds the best matching entity ID for a given domain and keyword.
-        Fetches states from HA to do the lookup.
+        Uses the state mirror when available, otherwise fetches states from HA.
         """
-        states = await self.ha.get_states()
+        states = await self._get_states()
         if not states:
             # Fallback for mock mode
             return f"{domain}.{keyword.replace(' ', '_')}"
@@ -1,5 +1,8 @@
 import asyncio
+import time
 import numpy as np
+from dataclasses import replace
+from typing import Optional
 from src.config import AppConfig
 from src.logger import setup_logger
 from src.audio_stream import AudioStream
@@ -8,21 +11,30 @@ from src.transcriber import Transcriber
 from src.brain import Brain
 from src.home_assistant import HomeAssistantClient
 from src.dispatcher import Dispatcher
+from src.state_mirror import StateMirror
 from src.voice import Voice
+from src.vad import EnergyGate
+from src.audio_journal import AudioJournal, WAKE_SCORE, WAKE_DETECTED, UTTERANCE_START, UTTERANCE_END
 
 logger = setup_logger("AudioEngine")
 
 class AudioEngine:
     def __init__(self, config: AppConfig):
         self.config = config
-        self.stream = AudioStream(config.audio)
-        self.wake_word_detector = WakeWordDetector(config.wake_word)
+        self.journal = AudioJournal.create(config.journal, config.audio.sample_rate) if config.journal.enabled else None
+        self.stream = AudioStream(config.audio, self.journal)
+        self.wake_word_detector = WakeWordDetector(config.wake_word, config.vad)
         self.transcriber = Transcriber(config.transcriber)
         self.brain = Brain(config)
         self.ha_client = HomeAssistantClient(config.ha)
-        self.dispatcher = Dispatcher(self.ha_client)
+        self.state_mirror = StateMirror(self.ha_client)
+        self.dispatcher = Dispatcher(self.ha_client, self.state_mirror)
         self.voice = Voice()
         self.running = False
+        self.state = "STARTING"  # Current pipeline stage, also read by the profiler
+        self._keep_warm_task: Optional[asyncio.Task] = None
+        self._partial_task: Optional[asyncio.Task] = None  # Partial decode that may still be running on the Whisper model
+        self.partial_wait_seconds = 0.0
 
     async def start(self):
         """Starts the main event loop"""
@@ -30,9 +42,14 @@ class AudioEngine:
         
         # Ensure brain model is ready
         await self.brain.ensure_model()
+
+        # Pay first-inference costs now instead of on the first command
+        self._set_state("WARMUP")
+        await self._warm_up()
         
         # Check HA connection
         await self.ha_client.check_connection()
+        await self.state_mirror.start()
         
         self.stream.start()
         logger.info("Engine started. Listening for commands...")
@@ -47,24 +64,199 @@ class AudioEngine:
         finally:
             self.stop()
 
+    def _journal_mark(self, kind: int, score: float = 0.0, offset: int = 0):
+        """Indexes an event at the end of the chunk just taken off the queue (plus offset samples)"""
+        if not self.journal:
+            return
+        # Chunks still queued are already in the journal but haven't been processed yet
+        queued = self.stream.queue.qsize() * self.config.audio.chunk_size
+        self.journal.mark(kind, score, self.journal.position - queued + offset)
+
+    async def _warm_up(self):
+        """Runs synthetic inference through every model and logs cold vs warm latency"""
+        await self._warm_up_model("Wake word", self.wake_word_detector, self.config.wake_word.warmup_runs)
+        await self._warm_up_model("Whisper", self.transcriber, self.config.transcriber.warmup_runs)
+        load_time = await self.brain.keep_warm()
+        if load_time is None:
+            logger.warning(f"Ollama model '{self.brain.model_name}' could not be warmed up; the first command will pay the load")
+        else:
+            logger.info(f"Ollama model '{self.brain.model_name}' loaded in {load_time * 1000:.0f}ms")
+
+    async def _warm_up_model(self, name: str, component, runs: int):
+        """Runs a component's blocking warmup() in an executor"""
+        if runs <= 0:
+            return
+        try:
+            cold, warm = await asyncio.get_running_loop().run_in_executor(None, component.warmup, runs)
+            logger.info(f"{name} warm-up: first inference {cold * 1000:.0f}ms, steady state {warm * 1000:.0f}ms")
+        except Exception as e:
+            logger.warning(f"{name} warm-up failed: {e}")
+
+    def _set_state(self, state: str, detail: str = ""):
+        self.state = state
+        logger.info(f"State: {state} ({detail})" if detail else f"State: {state}")
+
     def stop(self):
         """Stops the engine and releases resources"""
         self.running = False
         self.stream.stop()
+        self.state_mirror.stop()
+        if self._keep_warm_task:
+            self._keep_warm_task.cancel()
+            self._keep_warm_task = None
+        if self.journal:
+            # Stream is stopped, so the callback can no longer write; drop its reference first
+            self.stream.journal = None
+            self.journal.close()
+            self.journal = None
+        self._log_stats()
         logger.info("Engine stopped")
 
+    async def apply_config(self, new_config: AppConfig):
+        """
+        Applies a reloaded config while the audio stream keeps running.
+        Only components whose settings changed are rebuilt. New components are built off to
+        the side first (model loads in an executor) and all swapped in together once ready,
+        so the event loop never sees a half-applied config. On failure nothing is swapped.
+        """
+        old = self.config
+        new_config.test_mode = old.test_mode
+        if new_config.journal != old.journal:
+            logger.warning("Audio journal settings only take effect after a restart")
+            new_config.journal = old.journal
+        if self.journal and new_config.audio != old.audio:
+            # The journal's header fixes the sample rate; restarting the stream under it would corrupt clips
+            logger.warning("Audio settings only take effect after a restart while the audio journal is enabled")
+            new_config.audio = old.audio
+        loop = asyncio.get_running_loop()
+        rebuilt = {}
+
+        try:
+            wake_word_changed = (
+                new_config.wake_word.model_names != old.wake_word.model_names
+                or new_config.wake_word.inference_framework != old.wake_word.inference_framework
+            )
+            if wake_word_changed:
+                logger.info("Wake word model changed, loading in background")
+                rebuilt["wake_word_detector"] = await loop.run_in_executor(
+                    None, WakeWordDetector, new_config.wake_word, new_config.vad
+                )
+                await self._warm_up_model("Wake word", rebuilt["wake_word_detector"], new_config.wake_word.warmup_runs)
+
+            # beam_size is read per call; anything else needs a new Whisper model
+            if replace(new_config.transcriber, beam_size=old.transcriber.beam_size) != old.transcriber:
+                logger.info("Whisper settings changed, loading in background")
+                rebuilt["transcriber"] = await loop.run_in_executor(None, Transcriber, new_config.transcriber)
+                await self._warm_up_model("Whisper", rebuilt["transcriber"], new_config.transcriber.warmup_runs)
+
+            if new_config.brain != old.brain:
+                logger.info("Brain settings changed, reconnecting to Ollama")
+                rebuilt["brain"] = Brain(new_config)
+                if not await rebuilt["brain"].ensure_model():
+                    raise RuntimeError(f"Ollama model '{new_config.brain.model_name}' is not available")
+                await rebuilt["brain"].keep_warm()
+
+            if new_config.ha != old.ha:
+                logger.info("Home Assistant settings changed, reconnecting")
+                ha_client = HomeAssistantClient(new_config.ha)
+                # Without a token the client runs in mock mode, which is a valid choice
+                if new_config.ha.token and not await ha_client.check_connection():
+                    await ha_client.close()
+                    raise RuntimeError(f"Cannot connect to Home Assistant at {new_config.ha.url}")
+                rebuilt["ha_client"] = ha_client
+                rebuilt["state_mirror"] = StateMirror(ha_client)
+                rebuilt["dispatcher"] = Dispatcher(ha_client, rebuilt["state_mirror"])
+
+        except Exception as e:
+            logger.error(f"Failed to apply new config, keeping the running one: {e}")
+            return
+
+        # --- Swap (no awaits until the new config is in place) ---
+        old_brain, old_client, old_mirror = self.brain, self.ha_client, self.state_mirror
+        old_detector = self.wake_word_detector
+        for name, component in rebuilt.items():
+            setattr(self, name, component)
+
+        if "wake_word_detector" in rebuilt:
+            # Keep the skip counters running across the model swap
+            new_gate, old_gate = self.wake_word_detector.gate, old_detector.gate
+            if new_gate and old_gate:
+                new_gate.total_chunks, new_gate.skipped_chunks = old_gate.total_chunks, old_gate.skipped_chunks
+        else:
+            # Threshold is read from self.config; the gate can be swapped without touching the model
+            self.wake_word_detector.config = new_config.wake_word
+            if new_config.vad != old.vad:
+                self.wake_word_detector.update_gate(new_config.vad)
+        if "transcriber" not in rebuilt:
+            self.transcriber.config = new_config.transcriber
+
+        # Scalar settings (record_seconds, follow-up, speculation) are read live from here
+        self.config = new_config
+
+        if "brain" in rebuilt:
+            old_brain.cancel_speculation()
+        if "state_mirror" in rebuilt:
+            old_mirror.stop()
+            try:
+                await self.state_mirror.start()
+                await old_client.close()
+            except Exception as e:
+                # The new client is in place and the dispatcher falls back to REST without the mirror
+                logger.error(f"Failed to hand over to the new Home Assistant client: {e}")
+
+        if new_config.audio != old.audio:
+            # The only change that interrupts audio: the device has to be reopened
+            logger.info("Audio settings changed, restarting the audio stream")
+            self.stream.stop()
+            try:
+                self.stream.config = new_config.audio
+                self.stream.start()
+            except Exception as e:
+                # Never leave the assistant deaf: go back to the device settings that worked
+                logger.error(f"Failed to open the audio stream with the new settings, keeping the old ones: {e}")
+                self.stream.config = new_config.audio = old.audio
+                self.stream.start()
+
+        logger.info(f"Configuration reloaded (rebuilt: {', '.join(rebuilt) or 'nothing'})")
+
+    def _log_stats(self):
+        stats = self.wake_word_detector.stats()
+        if stats:
+            logger.info(
+                f"Energy gate skipped {stats['skipped_chunks']}/{stats['total_chunks']} chunks "
+                f"({stats['skip_ratio']:.1%} of wake word inference)"
+            )
+
+        tiers = self.brain.tier_stats()
+        if tiers:
+            summary = ", ".join(f"{tier} {ratio:.0%}" for tier, ratio in sorted(tiers.items(), key=lambda t: -t[1]))
+            logger.info(f"Brain tiers: {summary} (n={sum(self.brain.tier_hits.values())})")
+
+        speculation = self.brain.speculation_stats()
+        if speculation["hits"] or speculation["misses"]:
+            # Final transcripts that queued behind a partial decode paid for speculation too
+            net = speculation["saved_seconds"] - self.partial_wait_seconds
+            logger.info(
+                f"Speculation: {speculation['hits']} hits / {speculation['misses']} misses "
+                f"({speculation['hit_ratio']:.0%}), Brain overlap {speculation['saved_seconds']:.2f}s, "
+                f"waiting on partials {self.partial_wait_seconds:.2f}s, net {net:+.2f}s in total"
+            )
+
     async def _event_loop(self):
         """Main processing loop: Listen -> Detect -> Record -> Transcribe -> Think -> Act -> Speak"""
-        logger.info("State: LISTENING")
+        self._set_state("LISTENING")
         
         while self.running:
             chunk = await self.stream.get_chunk()
             
             # 1. Wake Word Detection
             score = self.wake_word_detector.detect(chunk)
+            if self.journal and score >= self.config.journal.score_floor:
+                self._journal_mark(WAKE_SCORE, score)
             
             if score >= self.config.wake_word.threshold:
                 logger.info(f"Wake Word Detected! (Score: {score:.2f})")
+                self._journal_mark(WAKE_DETECTED, score)
                 
                 if self.config.test_mode:
                     # --- TEST MODE PATH ---
@@ -77,64 +269,177 @@ class AudioEngine:
                         "action": "toggle"
                     }
                     
-                    logger.info("State: ACTING")
+                    self._set_state("ACTING")
                     await self.dispatcher.dispatch(intent)
                     await self.voice.speak("Test mode: Toggling bedroom lights.")
                     
                     # Reset
-                    logger.info("State: LISTENING")
+                    self._set_state("LISTENING")
                     self.stream.clear_queue()
+                    self.wake_word_detector.reset()
                     continue
                 
                 # --- NORMAL PATH ---
                 # 2. Record Audio
-                logger.info("State: RECORDING")
+                self._set_state("RECORDING")
                 audio_buffer = await self._capture_audio(seconds=self.config.record_seconds)
-                
-                # 3. Transcribe
-                logger.info("State: TRANSCRIBING")
-                text = await self.transcriber.transcribe(audio_buffer)
-                
-                if text:
-                    logger.info(f"User Command: {text}")
-                    
-                    # 4. Brain Processing
-                    logger.info("State: THINKING")
-                    intent = await self.brain.process(text)
-                    logger.info(f"Intent: {intent}")
-                    
-                    # 5. Action Dispatch & Speech
-                    if isinstance(intent, dict) and intent.get("intent") != "error":
-                        logger.info("State: ACTING")
-                        await self.dispatcher.dispatch(intent)
-                        
-                        # 6. Voice Feedback
-                        if intent.get("intent") == "general_query":
-                            response = intent.get("response")
-                            if response:
-                                await self.voice.speak(response)
-                        elif intent.get("intent") == "light_control":
-                             # Simple confirmation
-                             action = intent.get("action", "switching")
-                             location = intent.get("location", "lights")
-                             await self.voice.speak(f"Turning {action} {location} lights.")
-                        elif intent.get("intent") == "music_control":
-                             await self.voice.speak("Playing music.")
-                    
-                else:
-                    logger.warning("No speech detected or transcription failed.")
+                context = await self._handle_command(audio_buffer)
+
+                # Follow-up window: keep listening without the wake word while the user keeps talking
+                while context and self.config.follow_up_enabled:
+                    audio_buffer = await self._await_follow_up(context)
+                    if audio_buffer is None:
+                        break
+                    context = await self._handle_command(audio_buffer, context)
                 
                 # Reset to Listening
-                logger.info("State: LISTENING")
+                self._set_state("LISTENING")
                 self.stream.clear_queue()
+                self.wake_word_detector.reset()
+                self._log_stats()
+
+    async def _handle_command(self, audio_buffer: np.ndarray, context: Optional[dict] = None) -> Optional[dict]:
+        """
+        Transcribe -> Think -> Act -> Speak for one captured utterance.
+        Returns the exchange ({"text", "intent"}) to use as context for a follow-up, or None.
+        """
+        # 3. Transcribe
+        self._set_state("TRANSCRIBING")
+        await self._wait_for_partial()
+        text = await self.transcriber.transcribe(audio_buffer)
+        
+        if not text:
+            logger.warning("No speech detected or transcription failed.")
+            self.brain.cancel_speculation()
+            return None
+
+        logger.info(f"User Command: {text}")
+        
+        # 4. Brain Processing
+        self._set_state("THINKING")
+        intent = await self.brain.process(text, context)
+        logger.info(f"Intent: {intent}")
+        
+        # 5. Action Dispatch & Speech
+        if not isinstance(intent, dict) or intent.get("intent") == "error":
+            return None
+
+        self._set_state("ACTING")
+        await self.dispatcher.dispatch(intent)
+        
+        # 6. Voice Feedback
+        # Answers (general/state queries, skipped actions) come back in 'response'
+        response = intent.get("response")
+        if response:
+            await self.voice.speak(response)
+        elif intent.get("intent") == "light_control":
+             # Simple confirmation
+             action = intent.get("action", "switching")
+             location = intent.get("location", "lights")
+             await self.voice.speak(f"Turning {action} {location} lights.")
+        elif intent.get("intent") == "music_control":
+             await self.voice.speak("Playing music.")
+
+        return {"text": text, "intent": intent}
 
-    async def _capture_audio(self, seconds: int) -> np.ndarray:
-        """Captures audio for a fixed duration"""
+    async def _await_follow_up(self, context: dict) -> Optional[np.ndarray]:
+        """
+        Waits for speech during the follow-up window after Jarvis finishes speaking.
+        Returns the captured utterance, or None if the window passed in silence.
+        """
+        await self.voice.wait_until_idle()
+        # Drop our own voice picked up by the mic while speaking
+        self.stream.clear_queue()
+
+        # Keep the LLM loaded while we wait (Whisper stays resident in-process anyway)
+        if self._keep_warm_task and not self._keep_warm_task.done():
+            self._keep_warm_task.cancel()
+        self._keep_warm_task = asyncio.create_task(self.brain.keep_warm())
+
+        self._set_state("FOLLOW-UP", f"{self.config.follow_up_seconds:.0f}s")
+        # Start from the wake word gate's estimate of the room; without one, the gate calibrates on its first chunk
+        wake_gate = self.wake_word_detector.gate
+        onset_gate = EnergyGate(self.config.vad, wake_gate.noise_floor if wake_gate else None)
+        chunks_window = int(self.config.audio.sample_rate * self.config.follow_up_seconds / self.config.audio.chunk_size)
+
+        for _ in range(chunks_window):
+            chunk = await self.stream.get_chunk()
+            leading = onset_gate.process(chunk)
+            if leading:
+                # Speech onset: the gate hands back the quiet lead-in too, so no syllables are lost
+                self._set_state("RECORDING", "follow-up")
+                audio_buffer = await self._capture_audio(seconds=self.config.record_seconds, context=context, leading=leading)
+                return np.concatenate([c.flatten() for c in leading] + [audio_buffer])
+
+        logger.info("Follow-up window closed")
+        return None
+
+    async def _capture_audio(self, seconds: int, context: Optional[dict] = None, leading: Optional[list] = None) -> np.ndarray:
+        """
+        Captures audio for a fixed duration.
+        With speculation enabled, partial transcripts are produced in the background meanwhile.
+        leading holds chunks already captured before this call (included in partials only).
+        """
         chunks_needed = int(self.config.audio.sample_rate * seconds / self.config.audio.chunk_size)
         audio_data = []
+        self._journal_mark(UTTERANCE_START, offset=-sum(len(c) for c in leading or []))
+
+        speculation_task = None
+        if self.config.speculation_enabled:
+            capture_ends = time.monotonic() + seconds
+            speculation_task = asyncio.create_task(
+                self._speculate_on_partials(list(leading or []), audio_data, context, capture_ends)
+            )
         
-        for _ in range(chunks_needed):
-            chunk = await self.stream.get_chunk()
-            audio_data.append(chunk)
+        try:
+            for _ in range(chunks_needed):
+                chunk = await self.stream.get_chunk()
+                audio_data.append(chunk)
+        finally:
+            if speculation_task:
+                speculation_task.cancel()
+            self._journal_mark(UTTERANCE_END)
             
         return np.concatenate(audio_data).flatten()
+
+    async def _wait_for_partial(self):
+        """
+        Lets an in-flight partial decode finish before the final transcript starts. The final
+        would queue behind it on the Whisper model anyway; waiting here makes the delay visible.
+        """
+        task, self._partial_task = self._partial_task, None
+        if task is None or task.done():
+            return
+        started = time.monotonic()
+        await asyncio.wait([task])
+        waited = time.monotonic() - started
+        self.partial_wait_seconds += waited
+        logger.info(f"Final transcript waited {waited:.2f}s for an in-flight partial")
+
+    async def _speculate_on_partials(self, leading: list, audio_data: list, context: Optional[dict], capture_ends: float):
+        """
+        Periodically transcribes the audio captured so far. Once two consecutive partial
+        transcripts agree, the user has most likely finished and the Brain starts on it early.
+        Cancelling this task doesn't stop a decode already in the executor, so each partial is
+        kept in self._partial_task, and no partial is started that would outlast the capture.
+        """
+        previous = None
+        decode_seconds = 0.0  # Last partial's duration, the estimate for the next one
+        while True:
+            await asyncio.sleep(self.config.partial_interval_seconds)
+            chunks = leading + audio_data
+            if not chunks:
+                continue
+            if time.monotonic() + decode_seconds > capture_ends:
+                # It would still be decoding when the final transcript needs the model
+                return
+            started = time.monotonic()
+            self._partial_task = asyncio.create_task(
+                self.transcriber.transcribe(np.concatenate(chunks).flatten(), partial=True)
+            )
+            # Shielded: cancelling the speculation must leave the decode awaitable by _wait_for_partial
+            text = await asyncio.shield(self._partial_task)
+            decode_seconds = time.monotonic() - started
+            if text and text == previous:
+                self.brain.speculate(text, context)
+            previous = text
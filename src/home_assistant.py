@@ -82,3 +82,39 @@ class HomeAssistantClient:
         except Exception as e:
             logger.error(f"Error fetching states: {e}")
             return []
+
+    async def stream_state_changes(self):
+        """
+        Subscribes to state_changed events over the HA websocket API and yields their data
+        ({"entity_id", "old_state", "new_state"}).
+        Yields None once right after the subscription is confirmed, so callers can take a
+        fresh snapshot without missing changes.
+        Returns when the connection closes; raises on connection or auth failure.
+        """
+        if not self.config.token:
+            return
+
+        ws_url = self.base_url.replace("http", "ws", 1) + "/websocket"
+        # Separate session: the REST session's total timeout would cut the long-lived socket
+        timeout = aiohttp.ClientTimeout(total=None, connect=self.config.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.ws_connect(ws_url, heartbeat=30) as ws:
+                await ws.receive_json()  # auth_required
+                await ws.send_json({"type": "auth", "access_token": self.config.token})
+                reply = await ws.receive_json()
+                if reply.get("type") != "auth_ok":
+                    raise ConnectionError(f"HA websocket auth failed: {reply.get('message', reply.get('type'))}")
+
+                await ws.send_json({"id": 1, "type": "subscribe_events", "event_type": "state_changed"})
+                reply = await ws.receive_json()
+                if not reply.get("success"):
+                    raise ConnectionError(f"HA state subscription failed: {reply.get('error')}")
+                logger.info("Subscribed to Home Assistant state changes")
+                yield None
+
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    data = msg.json()
+                    if data.get("type") == "event":
+                        yield data["event"]["data"]
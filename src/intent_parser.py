@@ -0,0 +1,104 @@
+import re
+from typing import Optional
+
+# Deterministic intent matching for phrasings that don't need the LLM.
+
+_SENSOR_ATTRIBUTES = "temperature|humidity"
+
+_STATE_QUERY_PATTERNS = [
+    # "is the kitchen light on?", "are the bedroom lights off"
+    (re.compile(r"^(?:is|are) (?:the )?(?P<location>.+?) lights? (?:on|off)$"), "light", None),
+    # "what's the living room temperature"
+    (re.compile(rf"^what(?:'s| is) the (?P<location>.+?) (?P<attribute>{_SENSOR_ATTRIBUTES})$"), "sensor", None),
+    # "what is the temperature in the kitchen"
+    (re.compile(rf"^what(?:'s| is) the (?P<attribute>{_SENSOR_ATTRIBUTES}) in (?:the )?(?P<location>.+)$"), "sensor", None),
+    # "how warm is it in the bedroom"
+    (re.compile(r"^how (?:warm|cold|hot) is it in (?:the )?(?P<location>.+)$"), "sensor", "temperature"),
+    # "is the front door open", "is the garage locked"
+    (re.compile(r"^(?:is|are) (?:the )?(?P<location>.+?) (?:on|off|open|closed|locked|unlocked)$"), None, None),
+]
+
+# References that only make sense with conversation context; never treated as a location
+PRONOUNS = {"it", "they", "them", "that", "this", "those", "these", "he", "she"}
+
+_LIGHT_PATTERNS = [
+    # "turn on the kitchen lights", "switch off the bedroom light"
+    re.compile(r"^(?:please )?(?:turn|switch) (?P<action>on|off) (?:the )?(?P<location>.+?) lights?$"),
+    # "turn the kitchen lights on"
+    re.compile(r"^(?:please )?(?:turn|switch) (?:the )?(?P<location>.+?) lights? (?P<action>on|off)$"),
+    # "toggle the hallway light"
+    re.compile(r"^(?:please )?(?P<action>toggle) (?:the )?(?P<location>.+?) lights?$"),
+    # "dim the living room lights to 30 percent", "set the kitchen light to 80%"
+    re.compile(r"^(?:please )?(?:dim|set|brighten) (?:the )?(?P<location>.+?) lights? to (?P<brightness>\d{1,3})(?: percent)?$"),
+]
+
+_MUSIC_PATTERNS = [
+    (re.compile(r"^(?:please )?(?:play|resume)(?: the)? music$"), "play"),
+    (re.compile(r"^(?:please )?(?:pause|stop)(?: the)? music$"), "pause"),
+    (re.compile(r"^(?:next|skip)(?: the)?(?: song| track)?$"), "next"),
+    (re.compile(r"^previous(?: song| track)?$"), "previous"),
+    (re.compile(r"^(?:volume up|turn (?:it|the music) up)$"), "volume_up"),
+    (re.compile(r"^(?:volume down|turn (?:it|the music) down)$"), "volume_down"),
+]
+
+def normalize(text: str) -> str:
+    """Lowercases and strips punctuation Whisper tends to add"""
+    text = text.lower().strip()
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def has_pronoun(text: str) -> bool:
+    return any(word in PRONOUNS for word in normalize(text).split())
+
+def matches_name(keyword: str, name: str) -> bool:
+    """Whole-word match of keyword in a friendly name or entity id ('it' doesn't match 'kitchen')"""
+    name = re.sub(r"[._]", " ", name.lower())
+    return re.search(rf"\b{re.escape(keyword)}\b", name) is not None
+
+def parse_state_query(text: str) -> Optional[dict]:
+    """
+    Matches questions about the current state of a device or sensor.
+    Returns a state_query intent, or None if the text doesn't look like one.
+    """
+    normalized = normalize(text)
+    for pattern, domain, attribute in _STATE_QUERY_PATTERNS:
+        match = pattern.match(normalized)
+        if match:
+            groups = match.groupdict()
+            location = groups["location"].strip()
+            if not location or location in PRONOUNS:
+                # "is it on?" needs context only the LLM has
+                return None
+            return {
+                "intent": "state_query",
+                "location": location,
+                "domain": domain,
+                "attribute": groups.get("attribute") or attribute,
+            }
+    return None
+
+def parse_command(text: str) -> Optional[dict]:
+    """
+    Matches common light and music commands.
+    Used as a fallback when the LLM is too slow; returns None for anything it doesn't recognize.
+    """
+    normalized = normalize(text)
+
+    for pattern in _LIGHT_PATTERNS:
+        match = pattern.match(normalized)
+        if match:
+            groups = match.groupdict()
+            intent = {
+                "intent": "light_control",
+                "location": groups["location"],
+                "action": groups.get("action") or "on",
+            }
+            if groups.get("brightness"):
+                intent["brightness"] = min(int(groups["brightness"]), 100)
+            return intent
+
+    for pattern, action in _MUSIC_PATTERNS:
+        if pattern.match(normalized):
+            return {"intent": "music_control", "action": action}
+
+    return None
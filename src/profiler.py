@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+from src.config import ProfilerConfig
+from src.logger import setup_logger
+
+logger = setup_logger("Profiler")
+
+class SamplingProfiler:
+    """
+    In-process sampling profiler.
+    A background thread periodically captures the Python stack of every thread (asyncio loop,
+    TTS thread, executor threads, ...) and tags each sample with the current pipeline stage.
+    Only threads that burned CPU since the previous sample are recorded, so idle waits don't
+    drown out real work. Output is a collapsed-stack file (flamegraph.pl / speedscope) plus a
+    per-stage CPU summary.
+    """
+    def __init__(self, config: ProfilerConfig, stage_fn: Callable[[], str]):
+        self.config = config
+        self.stage_fn = stage_fn
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._reset()
+
+    def _reset(self):
+        self._stacks = Counter()
+        self._stage_cpu = Counter()
+        self._stage_wall = Counter()
+        self._thread_cpu = Counter()
+        self._last_thread_cpu: dict[int, float] = {}
+        self._samples = 0
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._reset()
+        self._stop_event.clear()
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Profiler-Thread")
+        self._thread.start()
+        logger.info(f"Profiling started (interval: {self.config.interval_ms}ms)")
+
+    def stop(self) -> Optional[str]:
+        """Stops sampling and writes the results. Returns the collapsed-stack file path."""
+        if not self.running:
+            return None
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        self._thread = None
+        return self.write()
+
+    def toggle(self):
+        """Runtime switch, e.g. from a signal handler"""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def _run(self):
+        interval = self.config.interval_ms / 1000
+        last_wall = time.monotonic()
+        last_cpu = time.process_time()
+
+        while not self._stop_event.wait(interval):
+            stage = self.stage_fn()
+
+            # Process CPU includes native worker threads (ONNX, CTranslate2) that have no Python stack
+            now_wall, now_cpu = time.monotonic(), time.process_time()
+            self._stage_wall[stage] += now_wall - last_wall
+            self._stage_cpu[stage] += now_cpu - last_cpu
+            last_wall, last_cpu = now_wall, now_cpu
+
+            self._sample(stage)
+
+    def _sample(self, stage: str):
+        own_ident = threading.get_ident()
+        threads = {t.ident: t for t in threading.enumerate()}
+        names = {ident: t.name for ident, t in threads.items()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+
+            thread = threads.get(ident)
+            cpu = self._get_thread_cpu(thread.native_id) if thread else None
+            if cpu is not None:
+                previous = self._last_thread_cpu.get(ident)
+                self._last_thread_cpu[ident] = cpu
+                if previous is None or cpu <= previous:
+                    continue  # first sight or idle since last sample
+                self._thread_cpu[names.get(ident, str(ident))] += cpu - previous
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.reverse()
+
+            thread_name = names.get(ident, str(ident))
+            self._stacks[";".join([stage, thread_name] + stack)] += 1
+            self._samples += 1
+
+    @staticmethod
+    def _get_thread_cpu(native_id: Optional[int]) -> Optional[float]:
+        """
+        Per-thread CPU time from /proc (Linux), else None.
+        Reading /proc by kernel thread id is safe even if the thread just exited (the file is
+        simply gone), unlike handing a stale pthread id to pthread_getcpuclockid.
+        """
+        if native_id is None:
+            return None
+        try:
+            with open(f"/proc/self/task/{native_id}/schedstat") as f:
+                return int(f.read().split()[0]) / 1e9  # nanoseconds on CPU
+        except (OSError, ValueError, IndexError):
+            pass
+        try:
+            # Kernels without schedstat: utime + stime in clock ticks (fields 14/15)
+            with open(f"/proc/self/task/{native_id}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def summary(self) -> str:
+        wall = time.monotonic() - self._started
+        cpu = sum(self._stage_cpu.values())
+        lines = [f"Profile: {wall:.1f}s wall, {cpu:.1f}s CPU, {self._samples} samples"]
+        lines.append(f"{'Stage':<14}{'CPU s':>9}{'CPU %':>8}{'Wall s':>9}")
+        for stage, stage_cpu in self._stage_cpu.most_common():
+            share = stage_cpu / cpu if cpu else 0.0
+            lines.append(f"{stage:<14}{stage_cpu:>9.2f}{share:>8.1%}{self._stage_wall[stage]:>9.1f}")
+        if self._thread_cpu:
+            lines.append("Python threads by CPU:")
+            for name, thread_cpu in self._thread_cpu.most_common():
+                lines.append(f"  {name:<30}{thread_cpu:>9.2f}s")
+        return "\n".join(lines)
+
+    def write(self) -> str:
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        base = os.path.join(self.config.output_dir, f"jarvis-{time.strftime('%Y%m%d-%H%M%S')}")
+
+        with open(f"{base}.folded", "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        summary = self.summary()
+        with open(f"{base}-summary.txt", "w") as f:
+            f.write(summary + "\n")
+
+        logger.info(f"{summary}\nProfile written to {base}.folded")
+        return f"{base}.folded"
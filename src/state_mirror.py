@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+from src.home_assistant import HomeAssistantClient
+from src.logger import setup_logger
+
+logger = setup_logger("StateMirror")
+
+class StateMirror:
+    """
+    In-process copy of Home Assistant entity states.
+    Takes one full snapshot over REST, then applies state_changed events from the websocket API,
+    so lookups never need a round trip to HA.
+    """
+    def __init__(self, ha_client: HomeAssistantClient, reconnect_seconds: float = 5.0):
+        self.ha = ha_client
+        self.reconnect_seconds = reconnect_seconds
+        self._states: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+
+    async def start(self):
+        """Starts following state changes in the background"""
+        if not self.ha.config.token:
+            logger.warning("No Home Assistant token provided. State mirror disabled.")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._follow())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.ready = False
+
+    async def refresh(self):
+        """Replaces the mirror with a full snapshot"""
+        states = await self.ha.get_states()
+        if states:
+            self._states = {s['entity_id']: s for s in states}
+            self.ready = True
+            logger.info(f"State mirror loaded {len(self._states)} entities")
+
+    async def _follow(self):
+        while True:
+            try:
+                async for change in self.ha.stream_state_changes():
+                    if change is None:
+                        # Subscribed: snapshot now, later events are applied on top of it
+                        await self.refresh()
+                    else:
+                        self._apply(change)
+                logger.warning("Home Assistant websocket closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"State mirror connection error: {e}")
+
+            # Changes are missed while disconnected, so stop answering from stale data
+            self.ready = False
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def _apply(self, change: dict):
+        entity_id = change.get('entity_id')
+        new_state = change.get('new_state')
+        if not entity_id:
+            return
+        if new_state is None:
+            self._states.pop(entity_id, None)
+            return
+
+        # Events buffered while the snapshot was loading may be older than the snapshot
+        current = self._states.get(entity_id)
+        if current and current.get('last_updated', '') > new_state.get('last_updated', ''):
+            return
+        self._states[entity_id] = new_state
+
+    def get(self, entity_id: str) -> Optional[dict]:
+        return self._states.get(entity_id)
+
+    def states(self) -> list[dict]:
+        return list(self._states.values())
@@ -1,6 +1,7 @@
 from faster_whisper import WhisperModel
 import numpy as np
 import asyncio
+import time
 from src.config import TranscriberConfig
 from src.logger import setup_logger
 
@@ -10,26 +11,51 @@ class Transcriber:
     def __init__(self, config: TranscriberConfig):
         self.config = config
         self.model = None
-        self.loop = asyncio.get_running_loop()
         self._load_model()
 
     def _load_model(self):
         logger.info(f"Loading Whisper Model ({self.config.model_size})...")
         try:
-            self.model = WhisperModel(
-                self.config.model_size, 
-                device=self.config.device, 
-                compute_type=self.config.compute_type
-            )
+            try:
+                # Prefer the local cache so startup never waits on a re-download
+                self.model = WhisperModel(
+                    self.config.model_size, 
+                    device=self.config.device, 
+                    compute_type=self.config.compute_type,
+                    local_files_only=True
+                )
+                logger.info("Whisper Model loaded from local cache")
+            except Exception as e:
+                logger.warning(f"Whisper Model not cached locally ({e}), downloading...")
+                self.model = WhisperModel(
+                    self.config.model_size, 
+                    device=self.config.device, 
+                    compute_type=self.config.compute_type
+                )
             logger.info("Whisper Model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load Whisper Model: {e}")
             raise
 
-    async def transcribe(self, audio_data: np.ndarray) -> str:
+    def warmup(self, runs: int) -> tuple[float, float]:
+        """
+        Transcribes a second of silence so CTranslate2's first-run setup happens now rather
+        than on the first command. Blocking; run it in an executor. Returns (cold, warm) latency in seconds.
+        """
+        silence = np.zeros(16000, dtype=np.float32)
+        timings = []
+        for _ in range(runs + 1):
+            started = time.perf_counter()
+            segments, _ = self.model.transcribe(silence, beam_size=self.config.beam_size)
+            list(segments)
+            timings.append(time.perf_counter() - started)
+        return timings[0], min(timings[1:])
+
+    async def transcribe(self, audio_data: np.ndarray, partial: bool = False) -> str:
         """
         Transcribes audio data to text.
         Runs the blocking transcribe call in a separate thread.
+        partial=True is for intermediate hypotheses while still recording: greedy decoding, quiet logging.
         """
         if not self.model:
             return ""
@@ -43,21 +69,26 @@ class Transcriber:
 
         logger.debug("Starting transcription...")
         
+        beam_size = 1 if partial else self.config.beam_size
+
         try:
             def _transcribe_sync():
-                segments, _ = self.model.transcribe(audio_float, beam_size=self.config.beam_size)
+                segments, _ = self.model.transcribe(audio_float, beam_size=beam_size)
                 # Consume generator to force computation in thread
                 return list(segments)
 
             # Run blocking transcribe in executor
-            segments = await self.loop.run_in_executor(None, _transcribe_sync)
+            segments = await asyncio.get_running_loop().run_in_executor(None, _transcribe_sync)
             
             text = ""
             for segment in segments:
                 text += segment.text
                 
             text = text.strip()
-            logger.info(f"Transcribed: '{text}'")
+            if partial:
+                logger.debug(f"Partial transcript: '{text}'")
+            else:
+                logger.info(f"Transcribed: '{text}'")
             return text
             
         except Exception as e:
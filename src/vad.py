@@ -0,0 +1,97 @@
+from collections import deque
+from typing import Optional
+import numpy as np
+from src.config import VADConfig
+
+class EnergyGate:
+    """
+    Cheap RMS energy gate placed in front of wake word inference.
+    "Quiet" is relative to a running noise-floor estimate, so the gate follows mic gain,
+    distance and background noise instead of relying on a fixed level.
+    Quiet chunks are held back in a short pre-roll buffer instead of being fed to the model.
+    When the gate opens, the pre-roll is replayed first so the model sees continuous audio
+    leading up to the speech onset.
+    """
+    def __init__(self, config: VADConfig, noise_floor: Optional[float] = None):
+        self.config = config
+        self._preroll = deque(maxlen=max(config.preroll_chunks, 0))
+        self._hangover = 0
+        self.noise_floor = noise_floor
+        self.total_chunks = 0
+        self.skipped_chunks = 0
+
+    def update_config(self, config: VADConfig):
+        """Applies new settings, keeping the counters and noise-floor estimate"""
+        self.config = config
+        self._preroll = deque(self._preroll, maxlen=max(config.preroll_chunks, 0))
+        self._hangover = min(self._hangover, config.hangover_chunks)
+
+    @property
+    def threshold(self) -> float:
+        if self.noise_floor is None:
+            return self.config.min_rms
+        return max(self.config.min_rms, self.noise_floor * self.config.noise_ratio)
+
+    @staticmethod
+    def rms(audio_chunk: np.ndarray) -> float:
+        """Root mean square level of an int16 chunk"""
+        samples = audio_chunk.astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def process(self, audio_chunk: np.ndarray) -> list[np.ndarray]:
+        """
+        Returns the chunks that should be fed to the wake word model, in order.
+        An empty list means the chunk was quiet and inference can be skipped.
+        """
+        self.total_chunks += 1
+        level = self.rms(audio_chunk)
+        # With no estimate yet the first chunk becomes the floor and counts as quiet,
+        # rather than being judged against the bare min_rms
+        is_loud = self.noise_floor is not None and level >= self.threshold
+        self._track_noise(level, is_loud)
+
+        if is_loud:
+            self._hangover = self.config.hangover_chunks
+        elif self._hangover > 0:
+            self._hangover -= 1
+        else:
+            self._preroll.append(audio_chunk)
+            self.skipped_chunks += 1
+            return []
+
+        # Gate is open: flush any held back context ahead of the current chunk.
+        # Replayed chunks do get inferred, so they no longer count as skipped.
+        chunks = list(self._preroll)
+        self.skipped_chunks -= len(chunks)
+        self._preroll.clear()
+        chunks.append(audio_chunk)
+        return chunks
+
+    def _track_noise(self, level: float, is_loud: bool):
+        if self.noise_floor is None:
+            self.noise_floor = level
+            return
+        # Loud chunks pull the floor up only slowly: a sustained louder background is absorbed
+        # within seconds, a one-second wake word barely moves it
+        rate = self.config.noise_adapt_rate
+        if is_loud or self._hangover > 0:
+            rate /= 10
+        self.noise_floor += rate * (level - self.noise_floor)
+
+    def reset(self):
+        """Drops buffered context, e.g. after the audio queue was cleared"""
+        self._preroll.clear()
+        self._hangover = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        if not self.total_chunks:
+            return 0.0
+        return self.skipped_chunks / self.total_chunks
+
+    def stats(self) -> dict:
+        return {
+            "total_chunks": self.total_chunks,
+            "skipped_chunks": self.skipped_chunks,
+            "skip_ratio": self.skip_ratio,
+        }
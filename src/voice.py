@@ -29,17 +29,17 @@ class Voice:
             # if voices: engine.setProperty('voice', voices[1].id)
             
             while True:
+                text = self._queue.get()
+                if text is None: # Sentinel to stop
+                    break
                 try:
-                    text = self._queue.get()
-                    if text is None: # Sentinel to stop
-                        break
-                    
                     logger.debug(f"Speaking: {text}")
                     engine.say(text)
                     engine.runAndWait()
-                    self._queue.task_done()
                 except Exception as e:
                     logger.error(f"Error in TTS loop: {e}")
+                finally:
+                    self._queue.task_done()
                     
         except Exception as e:
             logger.critical(f"Failed to initialize TTS engine in thread: {e}")
@@ -52,7 +52,24 @@ class Voice:
         logger.info(f"Queueing speech: '{text}'")
         self._queue.put(text)
         # We don't await here because we want to return control immediately
-        # If we wanted to wait for speech to finish, we'd need a callback or future.
+        # Use wait_until_idle() to wait for speech to finish.
+
+    async def wait_until_idle(self, timeout: float = 30.0) -> bool:
+        """
+        Waits until everything queued so far has been spoken.
+        Polls instead of blocking an executor thread on Queue.join, so it stays cancellable
+        and a hung TTS engine can't block shutdown. Returns False on timeout.
+        """
+        deadline = self.loop.time() + timeout
+        while self._queue.unfinished_tasks:
+            if not self._thread.is_alive():
+                # TTS thread died: nothing more will ever be spoken
+                return True
+            if self.loop.time() >= deadline:
+                logger.warning(f"Speech still pending after {timeout:.0f}s, not waiting any longer")
+                return False
+            await asyncio.sleep(0.05)
+        return True
 
     def stop(self):
         """Stops the TTS thread"""
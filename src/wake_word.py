@@ -1,15 +1,20 @@
+import os
+import time
 import openwakeword
+import openwakeword.utils
 from openwakeword.model import Model
 import numpy as np
-from src.config import WakeWordConfig
+from src.config import WakeWordConfig, VADConfig
 from src.logger import setup_logger
+from src.vad import EnergyGate
 
 logger = setup_logger("WakeWord")
 
 class WakeWordDetector:
-    def __init__(self, config: WakeWordConfig):
+    def __init__(self, config: WakeWordConfig, vad_config: VADConfig = None):
         self.config = config
         self.model = None
+        self.gate = EnergyGate(vad_config) if vad_config and vad_config.enabled else None
         self._load_model()
 
     def _load_model(self):
@@ -31,6 +36,14 @@ class WakeWordDetector:
             if not selected_paths:
                 raise ValueError("No valid wake word models found.")
 
+            # Only hit the network if the model files aren't in the local cache yet
+            missing = [p for p in selected_paths if not os.path.exists(p)]
+            if missing:
+                logger.warning(f"Wake word model files not cached locally, downloading: {missing}")
+                openwakeword.utils.download_models(model_names=self.config.model_names)
+            else:
+                logger.info("Wake word model files found in local cache")
+
             self.model = Model(
                 wakeword_model_paths=selected_paths
             )
@@ -48,6 +61,50 @@ class WakeWordDetector:
         if not self.model:
             return 0.0
 
+        if self.gate is None:
+            return self._predict(audio_chunk)
+
+        # Quiet chunks skip inference; on speech onset the held back context is replayed first
+        score = 0.0
+        for chunk in self.gate.process(audio_chunk):
+            score = self._predict(chunk)
+        return score
+
+    def warmup(self, runs: int) -> tuple[float, float]:
+        """
+        Runs silent chunks through the model so ONNX session setup happens now rather than
+        on the first real audio. Returns (cold, warm) latency in seconds.
+        """
+        silence = np.zeros(1280, dtype=np.int16)  # one 80ms frame
+        timings = []
+        for _ in range(runs + 1):
+            started = time.perf_counter()
+            self.model.predict(silence)
+            timings.append(time.perf_counter() - started)
+
+        # Don't let warm-up scores leak into the first real predictions
+        self.model.reset()
+        return timings[0], min(timings[1:])
+
+    def reset(self):
+        """Drops gate context that is no longer contiguous with the incoming audio"""
+        if self.gate:
+            self.gate.reset()
+
+    def update_gate(self, vad_config: VADConfig):
+        """Applies new gate settings without resetting its counters"""
+        if not vad_config.enabled:
+            self.gate = None
+        elif self.gate:
+            self.gate.update_config(vad_config)
+        else:
+            self.gate = EnergyGate(vad_config)
+
+    def stats(self) -> dict:
+        """Energy gate counters (empty when the gate is disabled)"""
+        return self.gate.stats() if self.gate else {}
+
+    def _predict(self, audio_chunk: np.ndarray) -> float:
         # Flatten if necessary (openwakeword expects 1D array or (N, samples))
         prediction = self.model.predict(audio_chunk.flatten())
         